@@ -2,7 +2,8 @@ import json
 import xml.etree.ElementTree as ET
 from datetime import datetime
 from typing import List
-from univers import Student, Course, Group, Enrollment
+from univers import Student, Course, Group, Enrollment, Faculty
+from diff import empty_delta, DELTA_SECTIONS
 
 def load_students_from_json(filename: str) -> List[Student]:
     with open(filename, 'r', encoding='utf-8') as f:
@@ -30,6 +31,8 @@ def load_students_from_json(filename: str) -> List[Student]:
                 title=course_title,
                 credits=5
             )
+            if en_data.get("faculty"):
+                course.set_faculty(Faculty(en_data["faculty"]))
             enrollment = Enrollment(student, course)
             enrollment.enrollment_date = datetime.fromisoformat(en_data["enrollment_date"])
             if en_data.get("grade") is not None:
@@ -70,6 +73,9 @@ def load_students_from_xml(filename: str) -> List[Student]:
                 course_title = title_elem.text if title_elem is not None else "Introduction to Programming"
 
                 course = Course(course_code, course_title, 5)
+                faculty_elem = en_elem.find("faculty")
+                if faculty_elem is not None and faculty_elem.text:
+                    course.set_faculty(Faculty(faculty_elem.text))
                 enrollment = Enrollment(student, course)
                 date_str = en_elem.find("enrollment_date").text
                 enrollment.enrollment_date = datetime.fromisoformat(date_str)
@@ -79,4 +85,23 @@ def load_students_from_xml(filename: str) -> List[Student]:
                 student.enrollments.append(enrollment)
         students.append(student)
 
-    return students
\ No newline at end of file
+    return students
+
+def load_delta_from_json(filename: str) -> dict:
+    with open(filename, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    if not isinstance(data, dict):
+        raise ValueError(f"{filename}: ожидался объект с разделами дельты")
+    unknown = [key for key in data if key not in DELTA_SECTIONS]
+    if unknown:
+        raise ValueError(f"{filename}: неизвестные разделы дельты {unknown}")
+
+    delta = empty_delta()
+    delta.update(data)
+    return delta
+
+
+def load_hash_index_from_json(filename: str) -> dict:
+    with open(filename, 'r', encoding='utf-8') as f:
+        return json.load(f)
@@ -0,0 +1,161 @@
+from typing import Dict, List, Optional, Tuple
+from univers import Student
+from serializers import record_hash
+
+
+DELTA_SECTIONS = (
+    "added",
+    "removed",
+    "updated",
+    "enrollments_added",
+    "enrollments_removed",
+    "grades_changed",
+    "enrollments_changed",
+    "group_moves",
+)
+
+_STUDENT_KEYS = ("student_id", "enrollments", "groups")
+_ENROLLMENT_KEYS = ("course_code", "enrollment_date", "grade")
+
+
+def empty_delta() -> dict:
+    return {section: [] for section in DELTA_SECTIONS}
+
+
+def _normalized_record(student: Student) -> dict:
+    # Порядок групп и записей на курсы не считается изменением
+    record = student.to_dict()
+    record["groups"] = sorted(record["groups"])
+    record["enrollments"] = sorted(
+        record["enrollments"], key=lambda en: (en["course_code"], en["enrollment_date"])
+    )
+    return record
+
+
+def hash_index(students: List[Student]) -> Dict[str, str]:
+    """Хэши записей по student_id — сохраняются вместе со снимком для следующего сравнения"""
+    return {s.student_id: record_hash(_normalized_record(s)) for s in students}
+
+
+def _index_students(students: List[Student]) -> Dict[str, Student]:
+    index = {}
+    for s in students:
+        if s.student_id in index:
+            raise ValueError(f"Повторяющийся student_id: {s.student_id}")
+        index[s.student_id] = s
+    return index
+
+
+def _index_enrollments(record: dict) -> Dict[Tuple[str, str, int], dict]:
+    # Ключ записи на курс — (course_code, enrollment_date);
+    # порядковый номер нужен только для полностью совпадающих записей
+    index = {}
+    counters: Dict[Tuple[str, str], int] = {}
+    for en in record["enrollments"]:
+        pair = (en["course_code"], en["enrollment_date"])
+        n = counters.get(pair, 0)
+        counters[pair] = n + 1
+        index[pair + (n,)] = en
+    return index
+
+
+def _enrollment_ref(student_id: str, key: Tuple[str, str, int]) -> dict:
+    return {
+        "student_id": student_id,
+        "course_code": key[0],
+        "enrollment_date": key[1],
+        "index": key[2],
+    }
+
+
+def _changed_fields(old: dict, new: dict, skip: Tuple[str, ...]) -> dict:
+    return {
+        key: new.get(key)
+        for key in sorted(set(old) | set(new))
+        if key not in skip and old.get(key) != new.get(key)
+    }
+
+
+def _diff_record(student_id: str, old_rec: dict, new_rec: dict, delta: dict):
+    entries_before = sum(len(v) for v in delta.values())
+
+    fields = _changed_fields(old_rec, new_rec, _STUDENT_KEYS)
+    if fields:
+        delta["updated"].append({"student_id": student_id, "fields": fields})
+
+    old_ens = _index_enrollments(old_rec)
+    new_ens = _index_enrollments(new_rec)
+    for key, en in new_ens.items():
+        old_en = old_ens.get(key)
+        if old_en is None:
+            delta["enrollments_added"].append({**_enrollment_ref(student_id, key), **en})
+        elif old_en["grade"] != en["grade"]:
+            delta["grades_changed"].append({
+                **_enrollment_ref(student_id, key),
+                "old_grade": old_en["grade"],
+                "new_grade": en["grade"],
+            })
+        if old_en is not None:
+            changed = _changed_fields(old_en, en, _ENROLLMENT_KEYS)
+            if changed:
+                delta["enrollments_changed"].append(
+                    {**_enrollment_ref(student_id, key), "fields": changed}
+                )
+    for key in old_ens:
+        if key not in new_ens:
+            delta["enrollments_removed"].append(_enrollment_ref(student_id, key))
+
+    old_groups = set(old_rec["groups"])
+    new_groups = set(new_rec["groups"])
+    if old_groups != new_groups:
+        delta["group_moves"].append({
+            "student_id": student_id,
+            "joined": sorted(new_groups - old_groups),
+            "left": sorted(old_groups - new_groups),
+        })
+
+    # Любое различие записей обязано попасть в дельту, иначе синхронизация его потеряет
+    if sum(len(v) for v in delta.values()) == entries_before:
+        raise ValueError(f"Изменение студента {student_id} не отражено в дельте")
+
+
+def diff_students(old: List[Student], new: List[Student],
+                  old_hashes: Optional[Dict[str, str]] = None,
+                  new_hashes: Optional[Dict[str, str]] = None) -> dict:
+    """Минимальная разница между двумя наборами студентов (по student_id/course_code).
+
+    Если передан old_hashes (hash_index прошлого снимка), записи с совпадающим
+    хэшем пропускаются без сериализации старой стороны; new_hashes позволяет
+    не пересчитывать хэши, уже посчитанные для сохранения нового индекса.
+    Без old_hashes записи сравниваются напрямую.
+    """
+    old_index = _index_students(old)
+    new_index = _index_students(new)
+
+    delta = empty_delta()
+
+    for student_id, student in new_index.items():
+        if student_id not in old_index:
+            delta["added"].append(student.to_dict())
+
+    for student_id in old_index:
+        if student_id not in new_index:
+            delta["removed"].append(student_id)
+
+    for student_id, student in new_index.items():
+        if student_id not in old_index:
+            continue
+        if old_hashes is not None and student_id in old_hashes:
+            if new_hashes is not None and student_id in new_hashes:
+                new_hash = new_hashes[student_id]
+            else:
+                new_hash = record_hash(_normalized_record(student))
+            if new_hash == old_hashes[student_id]:
+                continue
+
+        old_rec = _normalized_record(old_index[student_id])
+        new_rec = _normalized_record(student)
+        if old_rec != new_rec:
+            _diff_record(student_id, old_rec, new_rec, delta)
+
+    return delta
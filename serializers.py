@@ -1,7 +1,14 @@
+import hashlib
 import json
 import xml.etree.ElementTree as ET
 from typing import List
 
+
+def record_hash(record: dict) -> str:
+    # Хэш содержимого записи (порядок ключей не важен)
+    payload = json.dumps(record, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
 def save_students_to_json(students: List['Student'], filename: str):
     data = [s.to_dict() for s in students]
     with open(filename, 'w', encoding='utf-8') as f:
@@ -20,6 +27,8 @@ def save_students_to_xml(students: List['Student'], filename: str):
             en_elem = ET.SubElement(enrollments_elem, "enrollment")
             ET.SubElement(en_elem, "course_code").text = e.course.course_code
             ET.SubElement(en_elem, "enrollment_date").text = e.enrollment_date.isoformat()
+            if e.course.faculty is not None:
+                ET.SubElement(en_elem, "faculty").text = e.course.faculty.name
             if e.grade is not None:
                 ET.SubElement(en_elem, "grade").text = str(e.grade)
 
@@ -28,4 +37,15 @@ def save_students_to_xml(students: List['Student'], filename: str):
             ET.SubElement(groups_elem, "group").text = g.group_name
 
     tree = ET.ElementTree(root)
-    tree.write(filename, xml_declaration=True)
\ No newline at end of file
+    tree.write(filename, xml_declaration=True)
+
+def save_delta_to_json(delta: dict, filename: str):
+    # Пустые разделы не пишем — размер файла пропорционален изменениям
+    data = {key: value for key, value in delta.items() if value}
+    with open(filename, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+
+
+def save_hash_index_to_json(index: dict, filename: str):
+    with open(filename, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, separators=(',', ':'))
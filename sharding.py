@@ -0,0 +1,309 @@
+"""Шардированное хранение студентов: по группе или факультету, с манифестом.
+
+Каждый студент хранится ровно в одном шарде — по первой группе (ключ "group")
+или по факультету первого курса, у которого он указан (ключ "faculty").
+Студенты без группы/факультета попадают в шард NO_SHARD (None), который не
+пересекается с именами групп. В манифесте для каждого шарда записаны все
+группы его студентов, поэтому shards_for_group находит и тех, для кого
+группа не первая.
+
+Конкурентный доступ:
+  * несколько процессов могут одновременно сохранять разные шарды одного
+    каталога — файлы шардов пишутся без блокировки, а манифест
+    перечитывается и объединяется под файлом блокировки;
+  * при одновременной записи одного и того же шарда побеждает последний;
+  * сохранение с prune=True — полный снимок: шарды, записанные другими
+    процессами и отсутствующие в снимке, будут удалены;
+  * блокировка — fcntl.flock/msvcrt.locking на постоянном файле, поэтому
+    ОС снимает её, если процесс-писатель аварийно завершился;
+  * читатели блокировку не берут: манифест подменяется атомарно, а если
+    файл шарда успел смениться во время чтения, загрузка повторяется.
+"""
+import hashlib
+import json
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+from univers import Student
+from serializers import save_students_to_json, save_students_to_xml, record_hash
+from deserializers import load_students_from_json, load_students_from_xml
+
+MANIFEST_NAME = "manifest.json"
+LOCK_NAME = "manifest.lock"
+NO_SHARD = None
+
+_SAVERS = {"json": save_students_to_json, "xml": save_students_to_xml}
+_LOADERS = {"json": load_students_from_json, "xml": load_students_from_xml}
+
+
+def shard_by_group(student: Student) -> Optional[str]:
+    return student.groups[0].group_name if student.groups else NO_SHARD
+
+
+def shard_by_faculty(student: Student) -> Optional[str]:
+    # Факультет определяется по первому курсу, у которого он указан
+    for e in student.enrollments:
+        if e.course.faculty is not None:
+            return e.course.faculty.name
+    return NO_SHARD
+
+
+SHARD_KEYS = {"group": shard_by_group, "faculty": shard_by_faculty}
+
+
+def _shard_filename(shard: Optional[str], content_hash: str, fmt: str) -> str:
+    # Имя файла зависит от содержимого: конкурентные записи не затирают
+    # файлы друг друга, а старую версию можно удалить после смены манифеста
+    if shard is NO_SHARD:
+        return f"unassigned-{content_hash[:12]}.{fmt}"
+    slug = re.sub(r'[^\w.-]', '_', shard)
+    suffix = hashlib.sha1(shard.encode('utf-8')).hexdigest()[:8]
+    return f"{slug}-{suffix}-{content_hash[:12]}.{fmt}"
+
+
+def _shard_hash(students: List[Student]) -> str:
+    hashes = sorted(record_hash(s.to_dict()) for s in students)
+    return hashlib.sha1("".join(hashes).encode('utf-8')).hexdigest()
+
+
+def _make_entry(shard: Optional[str], students: List[Student], fmt: str) -> dict:
+    content_hash = _shard_hash(students)
+    return {
+        "name": shard,
+        "file": _shard_filename(shard, content_hash, fmt),
+        "hash": content_hash,
+        "students": [s.student_id for s in students],
+        "groups": sorted({g.group_name for s in students for g in s.groups}),
+    }
+
+
+def _require_manifest(directory: str) -> dict:
+    manifest = load_manifest(directory)
+    if manifest is None:
+        raise FileNotFoundError(os.path.join(directory, MANIFEST_NAME))
+    return manifest
+
+
+def load_manifest(directory: str) -> Optional[dict]:
+    try:
+        with open(os.path.join(directory, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _manifest_shards(manifest: Optional[dict]) -> Dict[Optional[str], dict]:
+    if manifest is None:
+        return {}
+    return {entry["name"]: entry for entry in manifest["shards"]}
+
+
+def _check_manifest(manifest: Optional[dict], key: str, fmt: str) -> Optional[dict]:
+    if manifest is not None and (manifest["key"] != key or manifest["format"] != fmt):
+        raise ValueError(
+            f"Каталог уже шардирован по '{manifest['key']}' в формате {manifest['format']}"
+        )
+    return manifest
+
+
+def _write_manifest(manifest: dict, directory: str):
+    path = os.path.join(directory, MANIFEST_NAME)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _try_lock(f) -> bool:
+    try:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+
+def _unlock(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+@contextmanager
+def _manifest_lock(directory: str, timeout: float = 30.0):
+    # Файл блокировки не удаляется: блокировку держит открытый дескриптор
+    path = os.path.join(directory, LOCK_NAME)
+    deadline = time.monotonic() + timeout
+    with open(path, 'a+b') as f:
+        while not _try_lock(f):
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Не удалось захватить блокировку {path}")
+            time.sleep(0.05)
+        try:
+            yield
+        finally:
+            _unlock(f)
+
+
+def _write_shard(students: List[Student], path: str, fmt: str):
+    # Пишем во временный файл и подменяем, чтобы читатель не увидел половину шарда
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    _SAVERS[fmt](students, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def _remove_file(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def save_sharded_students(students: List[Student], directory: str, key: str = "group",
+                          fmt: str = "json", removed_shards: Iterable[Optional[str]] = (),
+                          prune: bool = False,
+                          max_workers: Optional[int] = None) -> List[Optional[str]]:
+    """Сохраняет шарды переданных студентов; возвращает имена перезаписанных и удалённых шардов.
+
+    По умолчанию шарды, которых нет среди студентов, не трогаются — можно
+    сохранять результат load_sharded_students(directory, shards=[...]). Шард
+    удаляется, только если он указан в removed_shards или все его студенты
+    переехали в записываемые шарды; частично переехавшие студенты убираются
+    из старого шарда. С prune=True студенты считаются полным снимком: все
+    шарды, которых в нём нет, удаляются.
+    """
+    if key not in SHARD_KEYS:
+        raise ValueError(f"Неизвестный ключ шардирования: {key}")
+    if fmt not in _SAVERS:
+        raise ValueError(f"Неизвестный формат: {fmt}")
+    os.makedirs(directory, exist_ok=True)
+
+    partitions: Dict[Optional[str], List[Student]] = {}
+    for s in students:
+        partitions.setdefault(SHARD_KEYS[key](s), []).append(s)
+    removed = set(removed_shards)
+    overlap = removed & set(partitions)
+    if overlap:
+        raise ValueError(f"Шарды одновременно записываются и удаляются: {sorted(map(str, overlap))}")
+
+    known = _manifest_shards(_check_manifest(load_manifest(directory), key, fmt))
+    entries = {shard: _make_entry(shard, members, fmt) for shard, members in partitions.items()}
+    dirty = [
+        shard for shard, entry in entries.items()
+        if shard not in known
+        or known[shard]["hash"] != entry["hash"]
+        or not os.path.exists(os.path.join(directory, known[shard]["file"]))
+    ]
+
+    # Файлы шардов пишутся вне блокировки: их имена уникальны по содержимому
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        list(pool.map(
+            lambda shard: _write_shard(partitions[shard],
+                                       os.path.join(directory, entries[shard]["file"]), fmt),
+            dirty,
+        ))
+
+    with _manifest_lock(directory):
+        # Перечитываем манифест: другой процесс мог изменить его после нашего чтения
+        current = _manifest_shards(_check_manifest(load_manifest(directory), key, fmt))
+        missing = [shard for shard in removed if shard not in current]
+        if missing:
+            raise KeyError(f"Шарды отсутствуют в манифесте: {missing}")
+
+        if prune:
+            removed |= {shard for shard in current if shard not in partitions}
+
+        touched = list(dirty)
+        obsolete = []
+        for shard in dirty:
+            if shard in current and current[shard]["file"] != entries[shard]["file"]:
+                obsolete.append(current[shard]["file"])
+            current[shard] = entries[shard]
+        for shard in removed:
+            obsolete.append(current.pop(shard)["file"])
+            touched.append(shard)
+
+        # Студенты, переехавшие в записываемые шарды, убираются из остальных
+        written_ids = {s.student_id for shard in dirty for s in partitions[shard]}
+        for shard, entry in list(current.items()):
+            if shard in partitions:
+                continue
+            moved = written_ids.intersection(entry["students"])
+            if not moved:
+                continue
+            obsolete.append(entry["file"])
+            touched.append(shard)
+            remaining = [s for s in _LOADERS[fmt](os.path.join(directory, entry["file"]))
+                         if s.student_id not in moved]
+            if remaining:
+                new_entry = _make_entry(shard, remaining, fmt)
+                _write_shard(remaining, os.path.join(directory, new_entry["file"]), fmt)
+                current[shard] = new_entry
+            else:
+                del current[shard]
+
+        _write_manifest({"key": key, "format": fmt, "shards": list(current.values())}, directory)
+
+        referenced = {entry["file"] for entry in current.values()}
+        for filename in obsolete:
+            if filename not in referenced:
+                _remove_file(os.path.join(directory, filename))
+
+    return touched
+
+
+def load_sharded_students(directory: str, shards: Optional[Iterable[Optional[str]]] = None,
+                          max_workers: Optional[int] = None, retries: int = 3) -> List[Student]:
+    """Загружает только запрошенные шарды (по умолчанию — все)"""
+    if retries < 1:
+        raise ValueError("retries должно быть не меньше 1")
+    requested = None if shards is None else list(dict.fromkeys(shards))
+    for attempt in range(retries):
+        manifest = _require_manifest(directory)
+        known = _manifest_shards(manifest)
+        names = list(known) if requested is None else requested
+        missing = [name for name in names if name not in known]
+        if missing:
+            raise KeyError(f"Шарды отсутствуют в манифесте: {missing}")
+
+        loader = _LOADERS[manifest["format"]]
+        paths = [os.path.join(directory, known[name]["file"]) for name in names]
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                results = list(pool.map(loader, paths))
+            break
+        except FileNotFoundError:
+            # Шард заменён конкурентной записью — перечитываем манифест
+            if attempt == retries - 1:
+                raise
+
+    students = []
+    for part in results:
+        students.extend(part)
+    return students
+
+
+def shards_for_group(directory: str, group_name: str) -> List[Optional[str]]:
+    """Все шарды, где есть студенты группы (в том числе с ней не первой)"""
+    return [entry["name"] for entry in _manifest_shards(_require_manifest(directory)).values()
+            if group_name in entry["groups"]]
+
+
+def find_shard_for_student(directory: str, student_id: str) -> Optional[str]:
+    for shard, entry in _manifest_shards(_require_manifest(directory)).items():
+        if student_id in entry["students"]:
+            return shard
+    raise KeyError(f"Студент {student_id} не найден в манифесте")
@@ -47,7 +47,8 @@ class Student(Person):
                 {
                     "course_code": e.course.course_code,
                     "enrollment_date": e.enrollment_date.isoformat(),
-                    "grade": e.grade
+                    "grade": e.grade,
+                    "faculty": e.course.faculty.name if e.course.faculty else None
                 }
                 for e in self.enrollments
             ],